@@ -0,0 +1,19 @@
+# names are imported on first use, so modules that do not need taichi
+# (ring_buffer, frames) can be used by other processes without it
+_EXPORTS = {
+    'make_render': 'render',
+    'make_pixels': 'render',
+    'init': 'autotune',
+    'load_config': 'autotune',
+    'quantize': 'frames',
+    'to_rgb8': 'frames',
+    'AdaptiveRender': 'antialias',
+    'FrameGraph': 'graph',
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    import importlib
+    return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
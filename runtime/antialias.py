@@ -0,0 +1,130 @@
+import taichi as ti
+from .autotune import init, measure
+from .render import make_render, make_pixels
+import numpy as np
+
+
+@ti.func
+def subsample(fragCoord, s, samples: ti.template()):
+    '''
+    offset of sub-sample s from fragCoord: a point jittered inside cell s of the samples x samples grid over the pixel
+    the jitter is a hash of the pixel and the cell, so it does not flicker between frames
+    '''
+    cell = ti.Vector([s % samples, s // samples], dt=ti.f32)
+    seed = ti.cast(fragCoord, ti.f32) + cell * 0.37
+    jitter = ti.math.fract(ti.sin(ti.Vector([seed.dot(ti.Vector([12.9898, 78.233])),
+                                             seed.dot(ti.Vector([39.3467, 11.1351]))])) * 43758.5453)
+    return (cell + jitter) / samples - 0.5
+
+
+@ti.func
+def luminance(color):
+    return color.dot(ti.Vector([0.299, 0.587, 0.114]))
+
+
+def make_supersampled_render(mainImage, pixels, iResolution, samples=4, config=None):
+    '''render kernel shading every pixel with samples x samples stratified sub-samples'''
+    config = config or {}
+    block_dim = config.get('block_dim')
+    serialize = config.get('serialize', False)
+    parallelize = config.get('parallelize')
+    n = samples * samples
+    w, h = pixels.shape
+
+    @ti.kernel
+    def render(iTime: ti.f32, frame: ti.int32):
+        ti.loop_config(block_dim=block_dim, serialize=serialize, parallelize=parallelize)
+        for x, y in ti.ndrange(w, h):
+            fragCoord = ti.Vector([x, y])
+            color = ti.Vector([0., 0., 0.])
+            for s in range(n):
+                color += mainImage(fragCoord + subsample(fragCoord, s, samples), iTime, iResolution)
+            pixels[fragCoord] = color / n
+
+    return render
+
+
+class AdaptiveRender:
+    '''
+    render with edge-adaptive anti-aliasing:
+    1. the image is shaded with one sample per pixel
+    2. pixels whose luminance differs from a neighbour by more than threshold are marked
+    3. only marked pixels are shaded again with samples x samples stratified sub-samples
+    called like a render kernel: render(iTime, frame)
+    threshold : luminance contrast, above the paper noise of shader 2 (color * 0.95 ... 1.05,
+                less than 0.09 between neighbours) so the noise alone does not mark a pixel
+    '''
+
+    def __init__(self, mainImage, pixels, iResolution, samples=2, threshold=0.12, config=None):
+        w, h = pixels.shape
+        self.size = w * h
+        self.edges = ti.field(dtype=ti.i32, shape=(w, h))
+        self.count = ti.field(dtype=ti.i32, shape=())
+        self.shade = make_render(mainImage, pixels, iResolution, config)
+
+        edges, count = self.edges, self.count
+        n = samples * samples
+
+        @ti.kernel
+        def detect():
+            count[None] = 0
+            for i, j in pixels:
+                luma = luminance(pixels[i, j])
+                contrast = 0.
+                # 4 neighbours, clamped at the borders
+                for di, dj in ti.static(((-1, 0), (1, 0), (0, -1), (0, 1))):
+                    neighbour = luminance(pixels[ti.min(ti.max(i + di, 0), w - 1), ti.min(ti.max(j + dj, 0), h - 1)])
+                    contrast = ti.max(contrast, ti.abs(neighbour - luma))
+                edge = ti.select(contrast > threshold, 1, 0)
+                edges[i, j] = edge
+                count[None] += edge
+
+        @ti.kernel
+        def refine(iTime: ti.f32):
+            for fragCoord in ti.grouped(pixels):
+                if edges[fragCoord]:
+                    color = ti.Vector([0., 0., 0.])
+                    for s in range(n):
+                        color += mainImage(fragCoord + subsample(fragCoord, s, samples), iTime, iResolution)
+                    pixels[fragCoord] = color / n
+
+        self.detect = detect
+        self.refine = refine
+
+    def __call__(self, iTime, frame):
+        self.shade(iTime, frame)
+        self.detect()
+        self.refine(iTime)
+
+    def refined(self):
+        '''share of pixels refined in the last frame'''
+        return self.count[None] / self.size
+
+
+def compare_antialias(name, mainImage, resolution, samples=2, threshold=0.12, iTime=1., frames=10, **kwargs):
+    '''
+    cost and quality of point sampling and adaptive anti-aliasing against supersampling of every pixel
+    cost is compared with 2x2 supersampling (the same work as rendering at twice the resolution and downscaling),
+    quality is the RMS difference from the image supersampled with samples x samples sub-samples
+    '''
+    config = init(name, resolution, **kwargs)
+    iResolution = ti.math.vec2(*resolution)
+    pixels = make_pixels(resolution, config)
+
+    point = make_render(mainImage, pixels, iResolution, config)
+    adaptive = AdaptiveRender(mainImage, pixels, iResolution, samples, threshold, config)
+    ssaa2 = make_supersampled_render(mainImage, pixels, iResolution, 2, config)
+    supersampled = make_supersampled_render(mainImage, pixels, iResolution, samples, config) if samples != 2 else ssaa2
+
+    ssaa2_ms = measure(ssaa2, frames)
+    supersampled(iTime, 0)
+    reference = pixels.to_numpy()
+
+    print(f'{name} {resolution[0]}x{resolution[1]}, {samples}x{samples} sub-samples')
+    print(f'  {"ssaa 2x2":<10}{ssaa2_ms:10.3f} ms')
+    for label, render in (('point', point), ('adaptive', adaptive)):
+        ms = measure(render, frames)
+        render(iTime, 0)
+        error = np.sqrt(np.mean((pixels.to_numpy() - reference) ** 2))
+        print(f'  {label:<10}{ms:10.3f} ms  x{ssaa2_ms / ms:.2f} faster than ssaa 2x2, rms error {error:.4f}')
+    print(f'  refined {100. * adaptive.refined():.1f} % of pixels')
@@ -0,0 +1,125 @@
+import taichi as ti
+from .render import make_render, make_pixels
+import json
+import os
+import platform
+import time
+
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'shaders-hw', 'autotune.json')
+
+LAYOUTS = ('AOS', 'SOA')
+
+
+def current_arch():
+    '''name of the backend the runtime actually started on (cuda, vulkan, x64, ...)'''
+    return ti.lang.impl.current_cfg().arch.name
+
+
+def is_cpu(arch):
+    return arch in ('x64', 'arm64')
+
+
+def thread_candidates():
+    n = os.cpu_count() or 1
+    return sorted(set(t for t in (n, n // 2, n // 4) if t > 0), reverse=True)
+
+
+def loop_candidates(arch):
+    '''ti.loop_config options worth trying on the backend'''
+    if is_cpu(arch):
+        # on CPU block_dim is the number of iterations taken by a thread at once
+        # thread count is swept through cpu_max_num_threads, so parallelize is not tried
+        configs = [{'block_dim': b} for b in (None, 32, 128, 512)]
+        configs += [{'serialize': True}]
+    else:
+        configs = [{'block_dim': b} for b in (None, 64, 128, 256, 512, 1024)]
+    return configs
+
+
+def cache_key(name, resolution):
+    return f'{name} {resolution[0]}x{resolution[1]}'
+
+
+def read_cache(cache_path=CACHE_PATH):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_config(name, resolution, arch, cache_path=CACHE_PATH):
+    '''best configuration found on this host and backend, {} if the shader was never tuned'''
+    cache = read_cache(cache_path)
+    return cache.get(platform.node(), {}).get(arch, {}).get(cache_key(name, resolution), {})
+
+
+def save_config(name, resolution, arch, config, cache_path=CACHE_PATH):
+    cache = read_cache(cache_path)
+    cache.setdefault(platform.node(), {}).setdefault(arch, {})[cache_key(name, resolution)] = config
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+
+
+def init(name, resolution, cache_path=CACHE_PATH, **kwargs):
+    '''
+    ti.init with the tuned thread count applied
+    return configuration for make_pixels and make_render
+    '''
+    ti.init(**kwargs)
+    config = load_config(name, resolution, current_arch(), cache_path)
+
+    threads = config.get('cpu_max_num_threads')
+    if threads:
+        # thread count is fixed at initialization, nothing is compiled yet so restart is cheap
+        ti.reset()
+        ti.init(cpu_max_num_threads=threads, **kwargs)
+    return config
+
+
+def measure(render, frames):
+    '''average ms per frame, the first launch (compilation) is not counted'''
+    render(0., 0)
+    ti.sync()
+    start = time.perf_counter()
+    for frame in range(frames):
+        render(frame / 60., frame)
+    ti.sync()
+    return (time.perf_counter() - start) * 1000. / frames
+
+
+def autotune(name, mainImage, resolution, frames=10, cache_path=CACHE_PATH, **kwargs):
+    '''
+    sweep loop configurations, CPU thread counts and field layouts for the shader
+    the fastest configuration is saved to the cache and picked up by init()
+    '''
+    w, h = resolution
+    iResolution = ti.math.vec2(w, h)
+
+    ti.init(**kwargs)
+    arch = current_arch()
+    threads = thread_candidates() if is_cpu(arch) else [None]
+
+    best, best_ms = None, None
+    for thread_count in threads:
+        if thread_count:
+            ti.reset()
+            ti.init(cpu_max_num_threads=thread_count, **kwargs)
+
+        for layout in LAYOUTS:
+            pixels = make_pixels(resolution, {'layout': layout})
+            for loop in loop_candidates(arch):
+                config = dict(loop, layout=layout)
+                if thread_count:
+                    config['cpu_max_num_threads'] = thread_count
+
+                ms = measure(make_render(mainImage, pixels, iResolution, config), frames)
+                print(f'{name} {w}x{h} {arch} {config}: {ms:.3f} ms')
+                if best_ms is None or ms < best_ms:
+                    best, best_ms = config, ms
+
+    print(f'best: {best} {best_ms:.3f} ms')
+    save_config(name, resolution, arch, best, cache_path)
+    return best
@@ -0,0 +1,43 @@
+import taichi as ti
+from .autotune import measure
+from .render import make_render, make_pixels
+import numpy as np
+import time
+
+
+def compile_time(render):
+    '''ms of the first launch, which compiles the kernel'''
+    start = time.perf_counter()
+    render(0., 0)
+    ti.sync()
+    return (time.perf_counter() - start) * 1000.
+
+
+def bench_branchless(shaders, resolution, frames=10, iTime=1.):
+    '''
+    compare the render of mainImage with the render of its branch-free version on the CPU backend
+    the branch-free render is checked to produce the image of the usual render before its speedup is printed
+    shaders : list of (name, mainImage, mainImageBranchless)
+    '''
+    ti.init(arch=ti.cpu, default_fp=ti.f32)
+    iResolution = ti.math.vec2(*resolution)
+    pixels = make_pixels(resolution)
+
+    for name, mainImage, mainImageBranchless in shaders:
+        print(f'{name} {resolution[0]}x{resolution[1]}, {frames} frames')
+
+        render = make_render(mainImage, pixels, iResolution)
+        compile_ms = compile_time(render)
+        scalar = measure(render, frames)
+        render(iTime, 0)
+        reference = pixels.to_numpy()
+        print(f'  {"branches":<14}{scalar:10.3f} ms, compile {compile_ms:8.1f} ms')
+
+        render = make_render(mainImageBranchless, pixels, iResolution)
+        compile_ms = compile_time(render)
+        ms = measure(render, frames)
+        render(iTime, 0)
+        if not np.allclose(pixels.to_numpy(), reference, atol=1e-4):
+            print(f'  {"branch-free":<14}image differs from the usual render')
+            continue
+        print(f'  {"branch-free":<14}{ms:10.3f} ms, compile {compile_ms:8.1f} ms  x{scalar / ms:.2f}')
@@ -0,0 +1,176 @@
+import taichi as ti
+from .autotune import init
+from .frames import quantize
+from .render import make_pixels, make_render
+from collections import OrderedDict
+import hashlib
+import numpy as np
+import os
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'shaders-hw', 'frames')
+
+# chunk file starts with the "frame is written" flags, frames are aligned after them
+HEADER_ALIGN = 64
+
+
+def source_hash(directory):
+    '''hash of all python sources of a shader package'''
+    digest = hashlib.sha1()
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith('.py'):
+            with open(os.path.join(directory, file_name), 'rb') as f:
+                digest.update(file_name.encode())
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def frame_key(source, resolution, params):
+    '''content address of a frame sequence: shader source, resolution and parameters'''
+    text = f'{source} {resolution[0]}x{resolution[1]} {sorted(params.items())}'
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class FrameCache:
+    '''
+    content-addressed uint8 frames in memory-mapped chunk files
+    a chunk holds frames_per_chunk consecutive time steps of one frame sequence,
+    least recently used chunks are removed when the cache grows over max_bytes
+    '''
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=2 * 1024 ** 3, frames_per_chunk=32):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.frames_per_chunk = frames_per_chunk
+        self.header = -(-frames_per_chunk // HEADER_ALIGN) * HEADER_ALIGN
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # chunk name -> size in bytes, least recently used first (order survives restarts in mtime)
+        self.chunks = OrderedDict()
+        files = [f for f in os.listdir(directory) if f.endswith('.chunk')]
+        for file_name in sorted(files, key=lambda f: os.path.getmtime(self.path(f))):
+            self.chunks[file_name] = os.path.getsize(self.path(file_name))
+        # chunk name -> memory map
+        self.mapped = {}
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def size(self):
+        return sum(self.chunks.values())
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.
+
+    def _chunk(self, key, resolution, step, create):
+        '''(flags, frames) views of the chunk holding the step, None if it is not cached'''
+        chunk = step // self.frames_per_chunk
+        name = f'{key}-{chunk}.chunk'
+        w, h = resolution
+        size = self.header + self.frames_per_chunk * w * h * 3
+
+        if name not in self.mapped:
+            if name in self.chunks:
+                self.mapped[name] = np.memmap(self.path(name), dtype=np.uint8, mode='r+', shape=(size,))
+            elif create:
+                self._evict(size)
+                self.mapped[name] = np.memmap(self.path(name), dtype=np.uint8, mode='w+', shape=(size,))
+                self.chunks[name] = size
+            else:
+                return None
+
+        self.chunks.move_to_end(name)
+        data = self.mapped[name]
+        frames = data[self.header:].reshape(self.frames_per_chunk, w, h, 3)
+        return data[:self.frames_per_chunk], frames
+
+    def _evict(self, size):
+        while self.chunks and self.size() + size > self.max_bytes:
+            name, _ = self.chunks.popitem(last=False)
+            self.mapped.pop(name, None)
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                # still mapped by someone (Windows), it will be reused or removed later
+                pass
+
+    def get(self, key, resolution, step):
+        '''cached (w, h, 3) uint8 frame as a view of the chunk file, None on a miss'''
+        chunk = self._chunk(key, resolution, step, create=False)
+        slot = step % self.frames_per_chunk
+        if chunk is None or not chunk[0][slot]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return chunk[1][slot]
+
+    def put(self, key, resolution, step, frame):
+        flags, frames = self._chunk(key, resolution, step, create=True)
+        slot = step % self.frames_per_chunk
+        frames[slot] = frame
+        flags[slot] = 1
+
+    def close(self):
+        '''flush chunks and store recency order in file modification times'''
+        for data in self.mapped.values():
+            data.flush()
+        self.mapped.clear()
+        now = time.time()
+        for age, name in enumerate(reversed(self.chunks)):
+            os.utime(self.path(name), (now - age, now - age))
+
+
+def replay(name, mainImage, source_dir, resolution, fps=30, cache=None, **kwargs):
+    '''
+    play the shader from the frame cache, rendering only frames that are not cached yet
+    SPACE - pause, LEFT / RIGHT - scrub one second, ESCAPE - quit
+    '''
+    cache = cache or FrameCache()
+    key = frame_key(source_hash(source_dir), resolution, {'name': name, 'fps': fps})
+
+    config = init(name, resolution, **kwargs)
+    iResolution = ti.math.vec2(*resolution)
+    pixels = make_pixels(resolution, config)
+    render = make_render(mainImage, pixels, iResolution, config)
+
+    # cached frames are numpy arrays, fast_gui takes fields only
+    gui = ti.GUI(f'{name} replay', res=resolution)
+    step = 0
+    shown = None
+    paused = False
+    last = time.time()
+
+    while gui.running:
+        for e in gui.get_events(ti.GUI.PRESS):
+            if e.key == ti.GUI.ESCAPE:
+                gui.running = False
+            elif e.key == ti.GUI.SPACE:
+                paused = not paused
+            elif e.key == ti.GUI.LEFT:
+                step = max(0, step - fps)
+            elif e.key == ti.GUI.RIGHT:
+                step += fps
+
+        if step != shown:
+            frame = cache.get(key, resolution, step)
+            if frame is None:
+                # iTime is quantized to the frame step, so the frame is the same on every replay
+                render(step / fps, step)
+                frame = quantize(pixels.to_numpy())
+                cache.put(key, resolution, step, frame)
+            gui.set_image(frame)
+            shown = step
+        gui.show()
+
+        now = time.time()
+        if not paused and now - last >= 1. / fps:
+            step += 1
+            last = now
+
+    gui.close()
+    cache.close()
+    print(f'frame cache hit rate {100. * cache.hit_rate():.1f} % '
+          f'({cache.hits} hits, {cache.misses} misses), {cache.size() / 1024 ** 2:.1f} MB on disk')
@@ -0,0 +1,14 @@
+import numpy as np
+
+
+def quantize(image):
+    '''float image of a pixels field -> uint8 image of the same (w, h, 3) shape'''
+    return (np.clip(image, 0., 1.) * 255.).astype(np.uint8)
+
+
+def to_rgb8(image):
+    '''
+    (w, h, 3) float image of a pixels field (y from the bottom)
+    -> (h, w, 3) uint8 image with rows from top to bottom, as image formats expect
+    '''
+    return np.ascontiguousarray(quantize(image).transpose(1, 0, 2)[::-1])
@@ -0,0 +1,86 @@
+import taichi as ti
+import time
+
+
+class FrameGraph:
+    '''
+    per-frame work (render and quantization to rgb8) captured once as a compiled Taichi graph over ndarrays,
+    each frame replays it with a single launch from Python.
+    called like a render kernel: graph(iTime, frame), the (h, w, 3) uint8 image with rows
+    from top to bottom is in self.image
+    '''
+
+    def __init__(self, mainImage, resolution, config=None):
+        w, h = resolution
+        iResolution = ti.math.vec2(w, h)
+        config = config or {}
+        block_dim = config.get('block_dim')
+        serialize = config.get('serialize', False)
+        parallelize = config.get('parallelize')
+
+        @ti.kernel
+        def render(pixels: ti.types.ndarray(dtype=ti.math.vec3, ndim=2), iTime: ti.f32):
+            ti.loop_config(block_dim=block_dim, serialize=serialize, parallelize=parallelize)
+            for fragCoord in ti.grouped(pixels):
+                pixels[fragCoord] = mainImage(fragCoord, iTime, iResolution)
+
+        @ti.kernel
+        def quantize(pixels: ti.types.ndarray(dtype=ti.math.vec3, ndim=2), image: ti.types.ndarray(dtype=ti.u8, ndim=3)):
+            for i, j in ti.ndrange(w, h):
+                color = ti.math.clamp(pixels[i, j], 0., 1.) * 255.
+                for k in ti.static(range(3)):
+                    image[h - 1 - j, i, k] = ti.cast(color[k], ti.u8)
+
+        self.render = render
+        self.quantize = quantize
+        self.pixels = ti.Vector.ndarray(3, dtype=ti.f32, shape=(w, h))
+        self.image = ti.ndarray(dtype=ti.u8, shape=(h, w, 3))
+
+        sym_pixels = ti.graph.Arg(ti.graph.ArgKind.NDARRAY, 'pixels', dtype=ti.math.vec3, ndim=2)
+        sym_image = ti.graph.Arg(ti.graph.ArgKind.NDARRAY, 'image', dtype=ti.u8, ndim=3)
+        sym_iTime = ti.graph.Arg(ti.graph.ArgKind.SCALAR, 'iTime', ti.f32)
+
+        builder = ti.graph.GraphBuilder()
+        builder.dispatch(render, sym_pixels, sym_iTime)
+        builder.dispatch(quantize, sym_pixels, sym_image)
+        self.graph = builder.compile()
+        self.args = {'pixels': self.pixels, 'image': self.image, 'iTime': 0.}
+
+    def __call__(self, iTime, frame):
+        self.args['iTime'] = iTime
+        self.graph.run(self.args)
+
+
+def bench_graph(shaders, resolutions=((64, 36), (160, 90), (320, 180)), frames=300, **kwargs):
+    '''
+    per-frame launch time of the render and quantization kernels launched one by one
+    against replaying them as the compiled graph, the work on the device is the same,
+    so the difference is the saved launch overhead. nothing is read back to the host
+    shaders : list of (name, mainImage)
+    '''
+    ti.init(**kwargs)
+
+    for name, mainImage in shaders:
+        for resolution in resolutions:
+            frame_graph = FrameGraph(mainImage, resolution)
+            pixels, image = frame_graph.pixels, frame_graph.image
+
+            def kernels(iTime, frame):
+                frame_graph.render(pixels, iTime)
+                frame_graph.quantize(pixels, image)
+
+            print(f'{name} {resolution[0]}x{resolution[1]}, {frames} frames')
+            results = {}
+            for label, step in (('kernels', kernels), ('graph', frame_graph)):
+                # first frame compiles the kernels
+                step(0., 0)
+                ti.sync()
+                start = time.perf_counter()
+                for frame in range(frames):
+                    step(frame / 60., frame)
+                ti.sync()
+                results[label] = (time.perf_counter() - start) * 1e6 / frames
+
+            saved = results['kernels'] - results['graph']
+            print(f'  {"kernels":<10}{results["kernels"]:10.1f} us')
+            print(f'  {"graph":<10}{results["graph"]:10.1f} us  saves {saved:.1f} us per frame')
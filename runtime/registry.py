@@ -0,0 +1,14 @@
+import shader_1
+import shader_2
+
+# shader number -> (name, window title, shader package)
+SHADERS = {}
+
+
+def register(number, name, title, package):
+    '''package : shader package exporting mainImage, mainImageBranchless and RESOLUTION'''
+    SHADERS[number] = (name, title, package)
+
+
+register(1, 'shader_1', 'Shader #1', shader_1)
+register(2, 'shader_2', 'Shader #2', shader_2)
@@ -0,0 +1,32 @@
+import taichi as ti
+
+
+def make_render(mainImage, pixels, iResolution, config=None):
+    '''
+    compile-time configured render kernel
+    mainImage : ti.func(fragCoord, iTime, iResolution) of a shader
+    config : dict with optional 'block_dim', 'serialize', 'parallelize' (see ti.loop_config)
+    '''
+    config = config or {}
+    block_dim = config.get('block_dim')
+    serialize = config.get('serialize', False)
+    parallelize = config.get('parallelize')
+
+    w, h = pixels.shape
+
+    @ti.kernel
+    def render(iTime: ti.f32, frame: ti.int32):
+        # range-for, ti.loop_config(serialize=...) has no effect on a struct-for over the field
+        ti.loop_config(block_dim=block_dim, serialize=serialize, parallelize=parallelize)
+        for x, y in ti.ndrange(w, h):
+            fragCoord = ti.Vector([x, y])
+            pixels[fragCoord] = mainImage(fragCoord, iTime, iResolution)
+
+    return render
+
+
+def make_pixels(resolution, config=None):
+    '''3-dimentional vector field in the layout from config ('AOS' or 'SOA')'''
+    config = config or {}
+    layout = ti.Layout.SOA if config.get('layout') == 'SOA' else ti.Layout.AOS
+    return ti.Vector.field(3, dtype=ti.f32, shape=resolution, layout=layout)
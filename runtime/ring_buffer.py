@@ -0,0 +1,153 @@
+'''
+Layout of the shared memory block, numbers in native byte order:
+
+header, 64 bytes, uint64 each
+    magic, version, slots, width, height, format, frame_bytes, frames_written
+slot, repeated `slots` times
+    seq (uint64), frame index (uint64), iTime (float64), padding to 64 bytes
+    frame data, padded to a multiple of 64 bytes
+
+seq of a slot is odd while the frame is written and 2 * (frame index + 1) when it is complete,
+so a reader compares seq before and after reading to detect an overwrite without locks.
+'''
+
+from .frames import quantize
+from multiprocessing import shared_memory
+import numpy as np
+
+MAGIC = int.from_bytes(b'SHADERRB', 'little')
+VERSION = 1
+ALIGN = 64
+
+# format name -> (code, dtype)
+FORMATS = {'rgb8': (1, np.uint8), 'rgbf32': (2, np.float32)}
+
+
+def aligned(size):
+    return -(-size // ALIGN) * ALIGN
+
+
+class RingBuffer:
+    '''numpy views of the header and slots of a shared memory block'''
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.header = np.ndarray((8,), dtype=np.uint64, buffer=shm.buf)
+        magic, version, slots, width, height, format_code, frame_bytes, _ = (int(v) for v in self.header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{shm.name} is not a frame ring buffer')
+
+        self.slots = slots
+        self.resolution = width, height
+        self.format = next((name for name, (code, _) in FORMATS.items() if code == format_code), None)
+        if self.format is None:
+            raise ValueError(f'{shm.name} has unknown frame format {format_code}')
+        dtype = FORMATS[self.format][1]
+
+        stride = ALIGN + aligned(frame_bytes)
+        self.seq, self.index, self.time, self.frames = [], [], [], []
+        for slot in range(slots):
+            offset = ALIGN + slot * stride
+            meta = np.ndarray((2,), dtype=np.uint64, buffer=shm.buf, offset=offset)
+            self.seq.append(meta[0:1])
+            self.index.append(meta[1:2])
+            self.time.append(np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=offset + 16))
+            self.frames.append(np.ndarray((height, width, 3), dtype=dtype, buffer=shm.buf, offset=offset + ALIGN))
+
+    def frames_written(self):
+        return int(self.header[7])
+
+    def release(self):
+        '''drop the views, shared memory can not be closed while they exist'''
+        self.header = None
+        self.seq, self.index, self.time, self.frames = [], [], [], []
+
+
+class RingWriter:
+    '''
+    writes every frame of the pixels field into a ring of `slots` frames in shared memory
+    frames are (h, w, 3), rows from top to bottom, 'rgb8' (uint8) or 'rgbf32' (float32)
+    '''
+
+    def __init__(self, name, resolution, slots=4, format='rgb8'):
+        w, h = resolution
+        code, dtype = FORMATS[format]
+        frame_bytes = w * h * 3 * np.dtype(dtype).itemsize
+        size = ALIGN + slots * (ALIGN + aligned(frame_bytes))
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((8,), dtype=np.uint64, buffer=self.shm.buf)
+        header[:] = (MAGIC, VERSION, slots, w, h, code, frame_bytes, 0)
+        del header
+        self.ring = RingBuffer(self.shm)
+        self.frame = 0
+
+    def write(self, image, iTime):
+        '''image : (w, h, 3) float image of a pixels field'''
+        ring = self.ring
+        slot = self.frame % ring.slots
+
+        ring.seq[slot][0] = 2 * self.frame + 1
+        if ring.format == 'rgb8':
+            ring.frames[slot][:] = quantize(image).transpose(1, 0, 2)[::-1]
+        else:
+            ring.frames[slot][:] = image.transpose(1, 0, 2)[::-1]
+        ring.index[slot][0] = self.frame
+        ring.time[slot][0] = iTime
+        ring.seq[slot][0] = 2 * self.frame + 2
+
+        self.frame += 1
+        ring.header[7] = self.frame
+
+    def close(self):
+        self.ring.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class RingReader:
+    '''
+    attaches to a ring written by RingWriter in another process
+    frames are returned as views of the shared memory (no copy)
+    '''
+
+    def __init__(self, name):
+        self.shm = shared_memory.SharedMemory(name=name)
+        try:
+            # attaching registers the block to be removed when this process exits, only the writer owns it
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        except (ImportError, AttributeError, KeyError):
+            pass
+        self.ring = RingBuffer(self.shm)
+        self.resolution = self.ring.resolution
+        self.format = self.ring.format
+
+    def latest(self):
+        '''index of the newest complete frame, -1 if nothing was written yet'''
+        return self.ring.frames_written() - 1
+
+    def read(self, index=None):
+        '''
+        (frame view, iTime) of the frame (the newest if index is None),
+        None if the frame is not in the ring anymore or not written yet.
+        the view may be overwritten while it is used, check valid(index) afterwards
+        '''
+        if index is None:
+            index = self.latest()
+        if index < 0:
+            return None
+
+        slot = index % self.ring.slots
+        if int(self.ring.seq[slot][0]) != 2 * index + 2:
+            return None
+        frame, iTime = self.ring.frames[slot], float(self.ring.time[slot][0])
+        return (frame, iTime) if self.valid(index) else None
+
+    def valid(self, index):
+        '''True if the frame was not overwritten since it was read'''
+        return int(self.ring.seq[index % self.ring.slots][0]) == 2 * index + 2
+
+    def close(self):
+        self.ring.release()
+        self.shm.close()
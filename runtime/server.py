@@ -0,0 +1,217 @@
+import taichi as ti
+from .autotune import init
+from .frames import to_rgb8
+from .graph import FrameGraph
+from .render import make_pixels, make_render
+from PIL import Image
+import asyncio
+import io
+import threading
+import time
+
+BOUNDARY = b'frame'
+
+
+class Client:
+    '''connected viewer, keeps only the newest frame that was not sent yet'''
+
+    def __init__(self, peer, latest):
+        self.peer = peer
+        self.queue = asyncio.Queue(maxsize=1)
+        self.sent = 0
+        self.dropped = 0
+        # index of the last frame written to the client completely
+        self.sent_index = latest
+        # publish time of the oldest frame the client is still waiting for, None if it is up to date
+        self.waiting_since = None
+        self.queued_since = None
+
+    def offer(self, frame):
+        if self.queue.full():
+            # slow client, replace the waiting frame instead of stalling the renderer
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+        self.queued_since = frame[2]
+        if self.waiting_since is None:
+            self.waiting_since = frame[2]
+
+    def done(self, index):
+        '''the frame was written completely, the client now waits for the queued frame if there is one'''
+        self.sent += 1
+        self.sent_index = index
+        self.waiting_since = self.queued_since if not self.queue.empty() else None
+
+    def lag_ms(self, now):
+        return (now - self.waiting_since) * 1000. if self.waiting_since is not None else 0.
+
+
+class FrameServer:
+    '''
+    fan-out of encoded JPEG frames to any number of HTTP/MJPEG clients
+    frames are published from the render thread, asyncio loop runs in a background thread
+    '''
+
+    def __init__(self, host='127.0.0.1', port=8080):
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.clients = set()
+        self.handlers = set()
+        self.lock = threading.Lock()
+        self.latest = 0
+        self.started = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        '''start serving, raises the error if the server could not be started (e.g. port in use)'''
+        self.thread.start()
+        self.started.wait()
+        if self.error is not None:
+            self.thread.join()
+            raise self.error
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self._stop)
+        self.thread.join()
+
+    def publish(self, jpeg, index):
+        '''send the encoded frame to every client (called from the render thread)'''
+        self.loop.call_soon_threadsafe(self._broadcast, (jpeg, index, time.perf_counter()))
+
+    def stats(self):
+        '''
+        (peer, sent, dropped, lag frames, lag ms) of every client, lag is measured now,
+        so a stalled client shows a growing lag even though nothing is sent to it
+        '''
+        now = time.perf_counter()
+        with self.lock:
+            return [(c.peer, c.sent, c.dropped, self.latest - c.sent_index, c.lag_ms(now)) for c in self.clients]
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            self.error = e
+            self.loop.close()
+            self.started.set()
+            return
+        self.started.set()
+        self.loop.run_forever()
+
+        # let cancelled handlers finish before the loop is closed
+        handlers = list(self.handlers)
+        if handlers:
+            self.loop.run_until_complete(asyncio.gather(*handlers, return_exceptions=True))
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    def _stop(self):
+        self.server.close()
+        for handler in self.handlers:
+            handler.cancel()
+        self.loop.stop()
+
+    def _broadcast(self, frame):
+        self.latest = frame[1]
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.offer(frame)
+
+    async def _handle(self, reader, writer):
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        handler.add_done_callback(self.handlers.discard)
+        try:
+            # the request itself does not matter, every path is the stream
+            await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+
+        writer.write(b'HTTP/1.1 200 OK\r\n'
+                     b'Cache-Control: no-cache\r\n'
+                     b'Connection: close\r\n'
+                     b'Content-Type: multipart/x-mixed-replace; boundary=' + BOUNDARY + b'\r\n\r\n')
+
+        client = Client(writer.get_extra_info('peername'), self.latest)
+        with self.lock:
+            self.clients.add(client)
+        try:
+            while True:
+                jpeg, index, _ = await client.queue.get()
+                writer.write(b'--' + BOUNDARY + b'\r\n'
+                             b'Content-Type: image/jpeg\r\n'
+                             b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' +
+                             jpeg + b'\r\n')
+                await writer.drain()
+                client.done(index)
+        except (ConnectionError, asyncio.CancelledError):
+            # client left or the server is closing
+            pass
+        finally:
+            with self.lock:
+                self.clients.discard(client)
+            writer.close()
+
+
+def encode(rgb8, quality=80):
+    '''(h, w, 3) uint8 image -> JPEG bytes'''
+    buffer = io.BytesIO()
+    Image.fromarray(rgb8).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def serve(name, mainImage, resolution, port=8080, host='127.0.0.1', quality=80, report_every=2., graph=False, **kwargs):
+    '''
+    render the shader once per frame and stream it to all connected clients
+    open http://<host>:<port>/ in a browser or any MJPEG viewer
+    host : address to listen on, the local machine only by default ('0.0.0.0' for all interfaces)
+    graph : render and quantize with one launch of a compiled FrameGraph
+    '''
+    config = init(name, resolution, **kwargs)
+    if graph:
+        render = FrameGraph(mainImage, resolution, config)
+        frame_rgb8 = lambda: render.image.to_numpy()
+    else:
+        iResolution = ti.math.vec2(*resolution)
+        pixels = make_pixels(resolution, config)
+        render = make_render(mainImage, pixels, iResolution, config)
+        frame_rgb8 = lambda: to_rgb8(pixels.to_numpy())
+
+    server = FrameServer(host=host, port=port)
+    server.start()
+    print(f'{name} is streaming on http://{host}:{port}/')
+
+    frame = 0
+    start = time.time()
+    report = time.perf_counter()
+    frames, encode_ms = 0, 0.
+    try:
+        while True:
+            iTime = time.time() - start
+            render(iTime, frame)
+
+            encode_start = time.perf_counter()
+            jpeg = encode(frame_rgb8(), quality)
+            encode_ms += (time.perf_counter() - encode_start) * 1000.
+
+            server.publish(jpeg, frame)
+            frame += 1
+            frames += 1
+
+            now = time.perf_counter()
+            if now - report >= report_every:
+                print(f'{frames / (now - report):.1f} fps, encode {encode_ms / frames:.2f} ms, {len(jpeg)} bytes')
+                for peer, sent, dropped, lag_frames, lag_ms in server.stats():
+                    print(f'  {peer}: sent {sent}, dropped {dropped}, lag {lag_frames} frames / {lag_ms:.1f} ms')
+                report = now
+                frames, encode_ms = 0, 0.
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -0,0 +1,112 @@
+import taichi as ti
+from .antialias import AdaptiveRender
+from .autotune import current_arch, init, load_config
+from .registry import SHADERS
+from .render import make_pixels, make_render
+import os
+import time
+
+
+def resident_bytes():
+    '''resident memory of the process, None where /proc is not available'''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Session:
+    '''
+    one long-lived Taichi runtime holding compiled render kernels of the registered shaders
+    all shaders draw into one shared pixels field, switching does not re-initialize or recompile
+    the runtime is initialized with the autotuned thread count and field layout of shader `number`
+    '''
+
+    def __init__(self, resolution, number=1, antialias=False, **kwargs):
+        config = init(SHADERS[number][0], resolution, **kwargs)
+        self.resolution = resolution
+        self.iResolution = ti.math.vec2(*resolution)
+        self.antialias = antialias
+        self.pixels = make_pixels(resolution, config)
+        # the first launch allocates the fields and runtime buffers,
+        # do it here so they are not counted as memory of the shader loaded first
+        self.pixels.fill(0.)
+        ti.sync()
+        self.renders = {}
+        # shader number -> host memory taken by its kernels and fields, None if unknown
+        self.memory = {}
+        self.current = None
+
+    def load(self, number):
+        '''compile the render kernel of the shader (first launch) if it is not loaded yet'''
+        if number in self.renders:
+            return
+        name, _, shader = SHADERS[number]
+        mainImage = shader.mainImage
+        # thread count and layout are shared by all shaders, the loop configuration is per shader
+        config = load_config(name, self.resolution, current_arch())
+
+        before = resident_bytes()
+        if self.antialias:
+            render = AdaptiveRender(mainImage, self.pixels, self.iResolution, config=config)
+        else:
+            render = make_render(mainImage, self.pixels, self.iResolution, config)
+        render(0., 0)
+        ti.sync()
+        after = resident_bytes()
+
+        self.renders[number] = render
+        self.memory[number] = after - before if before is not None and after is not None else None
+
+    def switch(self, number):
+        self.load(number)
+        self.current = number
+        print(f'{SHADERS[number][1]} is running.')
+
+    def render(self, iTime, frame):
+        self.renders[self.current](iTime, frame)
+
+    def report(self):
+        w, h = self.resolution
+        print(f'shared pixels field: {w * h * 3 * 4 / 1024 ** 2:.1f} MB')
+        for number in sorted(self.renders):
+            memory = self.memory[number]
+            memory = f'{memory / 1024 ** 2:.1f} MB' if memory is not None else 'unknown'
+            print(f'{SHADERS[number][0]}: {memory} host memory')
+
+    def run(self, number, outputs=()):
+        '''
+        show the shaders in one window, keys 1 / 2 switch them
+        outputs : objects with write(image, iTime) getting every frame (e.g. RingWriter)
+        '''
+        for n in SHADERS:
+            self.load(n)
+        self.report()
+        self.switch(number)
+
+        gui = ti.GUI('Shaders', res=self.resolution, fast_gui=True)
+        frame = 0
+        start = time.time()
+
+        while gui.running:
+            if gui.get_event(ti.GUI.PRESS):
+                if gui.event.key == ti.GUI.ESCAPE:
+                    break
+                if gui.event.key.isdigit() and int(gui.event.key) in SHADERS:
+                    self.switch(int(gui.event.key))
+
+            iTime = time.time() - start
+            self.render(iTime, frame)
+            if outputs:
+                image = self.pixels.to_numpy()
+                for output in outputs:
+                    output.write(image, iTime)
+            gui.set_image(self.pixels)
+            gui.show()
+            frame += 1
+
+            if self.antialias and frame % 100 == 0:
+                print(f'refined {100. * self.renders[self.current].refined():.1f} % of pixels')
+
+        gui.close()
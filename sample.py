@@ -1,19 +1,81 @@
-from shader_1 import run as run_shader_1
-from shader_2 import run as run_shader_2
+from shader_2 import profile_stages_report
+from runtime.autotune import autotune
+from runtime.server import serve
+from runtime.frame_cache import replay
+from runtime.bench import bench_branchless
+from runtime.antialias import compare_antialias
+from runtime.registry import SHADERS
+from runtime.session import Session
+from runtime.ring_buffer import RingWriter
+from runtime.graph import bench_graph
 
-import sys
+import taichi as ti
+
+import argparse
+import os
 
 SHADER_NUMBER = 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('shader', nargs='?', default='1', help='shader number (see runtime/registry.py)')
+    parser.add_argument('--profile', action='store_true', help='print per-stage cost of the shader (shader 2 only, CPU backend)')
+    parser.add_argument('--autotune', action='store_true', help='find the fastest loop configuration for the shader')
+    parser.add_argument('--cpu', action='store_true', help='autotune for the CPU backend instead of GPU')
+    parser.add_argument('--serve', type=int, metavar='PORT', help='stream the shader as MJPEG over HTTP on the port')
+    parser.add_argument('--host', default='127.0.0.1', help='address the stream listens on (with --serve)')
+    parser.add_argument('--replay', action='store_true', help='play the shader through the on-disk frame cache')
+    parser.add_argument('--bench-branchless', action='store_true', help='compare the usual and the branch-free render of both shaders on CPU')
+    parser.add_argument('--aa', action='store_true', help='edge-adaptive anti-aliasing')
+    parser.add_argument('--compare-aa', action='store_true', help='compare adaptive anti-aliasing with supersampling')
+    parser.add_argument('--shm', metavar='NAME', help='also write frames to a shared memory ring buffer')
+    parser.add_argument('--graph', action='store_true', help='replay each frame as a compiled frame graph (with --serve)')
+    parser.add_argument('--bench-graph', action='store_true', help='compare the render loop with the compiled frame graph')
+    args = parser.parse_args()
+    if args.graph and args.serve is None:
+        parser.error('--graph is only supported with --serve')
+    if args.shm and (args.serve is not None or args.replay or args.profile or args.autotune
+                     or args.bench_branchless or args.bench_graph or args.compare_aa):
+        parser.error('--shm is only supported when showing the shaders in the window')
+
     try:
-        SHADER_NUMBER = int(sys.argv[1])
-        if SHADER_NUMBER not in set((1, 2)):
-            print("Wrong shader number. Avaliable 1 or 2.")
+        SHADER_NUMBER = int(args.shader)
+        if SHADER_NUMBER not in SHADERS:
+            print(f"Wrong shader number. Avaliable {', '.join(map(str, SHADERS))}.")
             SHADER_NUMBER = 1
     except:
         SHADER_NUMBER = 1
 
-    print(f'Shader {SHADER_NUMBER} is running.')
-
-    run_shader_1() if SHADER_NUMBER == 1 else run_shader_2()
+    name, _, shader = SHADERS[SHADER_NUMBER]
+    if args.profile:
+        if SHADER_NUMBER != 2:
+            parser.error('--profile is available for shader 2 only')
+        profile_stages_report()
+    elif args.bench_branchless:
+        bench_branchless([(n, s.mainImage, s.mainImageBranchless) for n, _, s in SHADERS.values()],
+                         shader.RESOLUTION)
+    elif args.bench_graph:
+        bench_graph([(n, s.mainImage) for n, _, s in SHADERS.values()],
+                    arch=ti.gpu, default_fp=ti.f32)
+    elif args.compare_aa:
+        compare_antialias(name, shader.mainImage, shader.RESOLUTION,
+                          arch=ti.gpu, default_fp=ti.f32)
+    elif args.autotune:
+        autotune(name, shader.mainImage, shader.RESOLUTION,
+                 arch=ti.cpu if args.cpu else ti.gpu, default_fp=ti.f32)
+    elif args.serve is not None:
+        serve(name, shader.mainImage, shader.RESOLUTION, port=args.serve,
+              host=args.host, graph=args.graph, arch=ti.gpu, default_fp=ti.f32)
+    elif args.replay:
+        replay(name, shader.mainImage, os.path.dirname(shader.__file__),
+               shader.RESOLUTION, arch=ti.gpu, default_fp=ti.f32)
+    else:
+        # all registered shaders are compiled once, number keys switch them
+        session = Session(shader.RESOLUTION, SHADER_NUMBER, antialias=args.aa,
+                          arch=ti.gpu, default_fp=ti.f32)
+        outputs = [RingWriter(args.shm, session.resolution)] if args.shm else []
+        try:
+            session.run(SHADER_NUMBER, outputs)
+        finally:
+            for output in outputs:
+                output.close()
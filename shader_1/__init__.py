@@ -1,3 +1,3 @@
 from .utils import *
-from .mainImage import mainImage
-from .main import run
+from .mainImage import mainImage, mainImageBranchless
+from .main import RESOLUTION
@@ -62,7 +62,7 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
 
     # randomly turn pattern squares (tile)
     rand_n = Hash21(id) # random number between 0 and 5
-    if rand_n < 0.5: grid_view.x *= -1.
+    grid_view.x *= ti.select(rand_n < 0.5, -1., 1.)
 
 
     # define pulsations as thickening of figures
@@ -93,4 +93,10 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
 
     col *= pow(thinning, 2.)
 
-    return col
\ No newline at end of file
+    return col
+
+
+@ti.func
+def mainImageBranchless(fragCoord, iTime: ti.f32, iResolution):
+    '''mainImage has no divergent branches, it is used as is'''
+    return mainImage(fragCoord, iTime, iResolution)
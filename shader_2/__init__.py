@@ -1,3 +1,4 @@
 from .utils import *
-from .mainImage import mainImage
-from .main import run
+from .mainImage import mainImage, mainImageBranchless
+from .main import RESOLUTION
+from .profile import profile_stages_report
@@ -11,12 +11,13 @@ def disp(p):
     return -ofs + (1. + 2. * ofs) * hash22(p)
 
 @ti.func
-def voronoiB(u): # returns len + id
+def voronoiB(u, branchless: ti.template()): # returns len + id
     ''' 
     Voronoi distance to borders.
     inspired by https://www.shadertoy.com/view/ldl3W8
     return vec3
     u : vec2 
+    branchless : skip the own cell with a select (computes its distance anyway)
     '''
     iu = vec2(floor(u))
     C = vec2(0.)
@@ -29,10 +30,10 @@ def voronoiB(u): # returns len + id
         o = disp(p)
         r = vec2(p - u + o)
         d = dot(r, r)
-        if d < m: 
-            m = d
-            C = p - iu
-            P = r
+        closer = d < m
+        m = ti.select(closer, d, m)
+        C = ti.select(closer, p - iu, C)
+        P = ti.select(closer, r, P)
 
     m = 1e9
     
@@ -41,7 +42,10 @@ def voronoiB(u): # returns len + id
         o = disp(p)
         r = p - u + o
 
-        if dot(P - r, P - r) > 1e-5:
+        if ti.static(branchless):
+            # the own cell (r == P) is skipped, its NaN distance is not selected
+            m = ti.select(dot(P - r, P - r) > 1e-5, min(m, 0.5 * dot((P + r), normalize(r - P))), m)
+        elif dot(P - r, P - r) > 1e-5:
             m = min(m, 0.5 * dot((P + r), normalize(r - P)))
     return vec3(m, P + u)
 
@@ -93,27 +97,36 @@ def fbm22(p):
 
 
 @ti.func
-def background(fragCoord, iTime: ti.f32, iResolution):
+def crack_uv(fragCoord, iTime: ti.f32, iResolution):
+    '''background coordinates, scaled and moving with time'''
     U = vec2(ti.cast(fragCoord.x, ti.f32), ti.cast(fragCoord.y, ti.f32))
     U *= 5. / iResolution.y
 
     U.x += iTime / 8.
     U.y += (sin(iTime) / 20.) + 1.4
+    return U
 
-    RATIO = 2.
 
+@ti.func
+def crack_offset(U, iTime: ti.f32):
+    '''add pseudo Perlin noise (the fbm stage of the background)'''
     CRACK_zebra_scale = .08
     CRACK_zebra_amp = (sin(iTime) / 20.) + 1.4
+
+    return fbm22(CRACK_zebra_scale * U) / CRACK_zebra_scale / CRACK_zebra_amp
+
+
+@ti.func
+def crack_color(U, D, branchless: ti.template()):
+    '''evaluate Voronoi distance to borders (the voronoi stage of the background)'''
+    RATIO = 2.
+
     CRACK_profile = 0.25 
     CRACK_slope = 1.4
     CRACK_width = .0
 
-
     V = U / vec2(RATIO, 1.) # voronoi cell shape
-    ''' add pseudo Perlin noise '''
-    D = fbm22(CRACK_zebra_scale * U) / CRACK_zebra_scale / CRACK_zebra_amp
-    '''evaluate Voronoi distance to borders'''
-    H = voronoiB(V + D); 
+    H = voronoiB(V + D, branchless); 
         
     d = H.x # distance to cracks
 
@@ -124,3 +137,10 @@ def background(fragCoord, iTime: ti.f32, iResolution):
     col = (sin(vec3(d)) + 0.3) * white
 
     return col
+
+
+@ti.func
+def background(fragCoord, iTime: ti.f32, iResolution, branchless: ti.template()):
+    U = crack_uv(fragCoord, iTime, iResolution)
+    D = crack_offset(U, iTime)
+    return crack_color(U, D, branchless)
@@ -20,13 +20,34 @@ def hypot(a, b):
 
 
 @ti.func
-def bezier(a, b, c, p):
+def bezier_one_root(px, py, e, dis, min_x, max_x, scale):
+    '''one root'''
+    f = px * 0.25 + sign(px) * sqrt(dis) * 0.5
+    qx = clamp(cbrt(f) + cbrt(e / f), min_x, max_x)
+    return hypot(qx - px, qx * qx - py) / scale
+
+@ti.func
+def bezier_three_roots(px, py, l, min_x, max_x, scale):
+    '''three roots
+    However, the center one can never be the closest, so we can ignore it.'''
+    r3p = sqrt(py - 0.5) * (2.0 / sqrt(3.0))
+    ac = acos(-1.5 * px / (l * r3p)) / 3.0
+    qx0 = clamp(r3p * cos(ac              ), min_x, max_x)
+    qx1 = clamp(r3p * cos(ac - 4.188790205), min_x, max_x)
+
+    return min(
+        hypot(qx0 - px, qx0 * qx0 - py),
+        hypot(qx1 - px, qx1 * qx1 - py)) / scale
+
+@ti.func
+def bezier(a, b, c, p, branchless: ti.template()):
     '''
     Returns the exact distance to a quadratic bezier curve.
 
     a, c : start and end points of the curve
     b : control point of the curve
     p : current pixel coordinates
+    branchless : evaluate both cases and select the result (no divergent branch)
     '''
     ny          = vec2(normalize(a - 2.0 * b + c))
     nx          = vec2(ny.y, -ny.x)
@@ -63,22 +84,15 @@ def bezier(a, b, c, p):
 
     result = 0.
 
-    if (0.0 <= dis):
-        '''one root'''
-        f = px * 0.25 + sign(px) * sqrt(dis) * 0.5
-        qx = clamp(cbrt(f) + cbrt(e / f), min_x, max_x)
-        result = hypot(qx - px, qx * qx - py) / scale
+    if ti.static(branchless):
+        # the case that is not selected may be NaN, select does not propagate it
+        result = ti.select(0.0 <= dis,
+                           bezier_one_root(px, py, e, dis, min_x, max_x, scale),
+                           bezier_three_roots(px, py, l, min_x, max_x, scale))
+    elif (0.0 <= dis):
+        result = bezier_one_root(px, py, e, dis, min_x, max_x, scale)
     else:
-        '''three roots
-        However, the center one can never be the closest, so we can ignore it.'''
-        r3p = sqrt(py - 0.5) * (2.0 / sqrt(3.0))
-        ac = acos(-1.5 * px / (l * r3p)) / 3.0
-        qx0 = clamp(r3p * cos(ac              ), min_x, max_x)
-        qx1 = clamp(r3p * cos(ac - 4.188790205), min_x, max_x)
-    
-        result =  min(
-            hypot(qx0 - px, qx0 * qx0 - py),
-            hypot(qx1 - px, qx1 * qx1 - py)) / scale
+        result = bezier_three_roots(px, py, l, min_x, max_x, scale)
     return result
 
 @ti.func
@@ -103,47 +117,48 @@ def high_between(f, lo, hi, iResolution):
     return smoothstep(-d, d, rad - abs(f - mid))
 
 @ti.func
-def pattern(i: int, p, iResolution):
-    '''define 4 pattern types for each belt'''
+def dots(p, iResolution):
+    '''pattern of dots with random radius'''
+    rot = sqrt(2.0) / 2.0 * mat2( 1.0, -1.0, 1.0,  1.0)
+    dot_center = multiply2_left(transpose(rot), round(multiply2_left(rot, p) * 100.0)) / 100.0
+    dot_radius = mix(rand(dot_center.x + dot_center.y), 1.0, 0.8) * 0.003
+    return high_between(length(dot_center - p), dot_radius, 100.0, iResolution)
+
+@ti.func
+def pattern(i: int, p, iResolution, branchless: ti.template()):
+    '''
+    define 4 pattern types for each belt
+    branchless : evaluate all patterns and select one (no divergent branch)
+    '''
     i = i % 4
     s = (p.x - p.y) / sqrt(2.0)
 
     result = 0.
-    if (0 == i):
-        result = high_between(mod(s, 0.03), 0.2 * 0.03, 0.55 * 0.03, iResolution)
-    
-    if (1 == i):
+    if ti.static(branchless):
         m = mod(s, 0.03)
-        result = high_between(m, 0.1 * 0.03, 0.3 * 0.03, iResolution) + high_between(m, 0.5 * 0.03, 0.8 * 0.03, iResolution)
-    
-    if (2 == i):
-        result = high_between(mod(s, 0.01), 0.2 * 0.01, 0.65 * 0.01, iResolution)
-    
-    if (3 == i):
-        rot = sqrt(2.0) / 2.0 * mat2( 1.0, -1.0, 1.0,  1.0)
-        dot_center = multiply2_left(transpose(rot), round(multiply2_left(rot, p) * 100.0)) / 100.0
-        dot_radius = mix(rand(dot_center.x + dot_center.y), 1.0, 0.8) * 0.003
-        result = high_between(length(dot_center - p), dot_radius, 100.0, iResolution)
+        result = ti.select(0 == i, high_between(m, 0.2 * 0.03, 0.55 * 0.03, iResolution),
+                 ti.select(1 == i, high_between(m, 0.1 * 0.03, 0.3 * 0.03, iResolution) + high_between(m, 0.5 * 0.03, 0.8 * 0.03, iResolution),
+                 ti.select(2 == i, high_between(mod(s, 0.01), 0.2 * 0.01, 0.65 * 0.01, iResolution),
+                           dots(p, iResolution))))
+    else:
+        if (0 == i):
+            result = high_between(mod(s, 0.03), 0.2 * 0.03, 0.55 * 0.03, iResolution)
+        
+        if (1 == i):
+            m = mod(s, 0.03)
+            result = high_between(m, 0.1 * 0.03, 0.3 * 0.03, iResolution) + high_between(m, 0.5 * 0.03, 0.8 * 0.03, iResolution)
+        
+        if (2 == i):
+            result = high_between(mod(s, 0.01), 0.2 * 0.01, 0.65 * 0.01, iResolution)
+        
+        if (3 == i):
+            result = dots(p, iResolution)
 
     return result
 
 
 @ti.func
-def mainImage(fragCoord, iTime: ti.f32, iResolution):
-    ''' CONSTANTS '''
-    red    = vec3(0.816, 0.325, 0.227)
-    green  = vec3(0.584, 0.639, 0.38)
-    blue   = vec3(0.498, 0.588, 0.49)
-    yellow = vec3(0.843, 0.725, 0.353)
-    white  = vec3(0.91,  0.804, 0.596)
-    black  = vec3(0.125, 0.098, 0.078)
-
-    NUM_BELTS = 10
-
-    fg_colors = mat83(blue,    red,  green, green, yellow,  blue,   red, green)
-    bg_colors = mat83(red, yellow, yellow,  blue,  white, white, white, white)
-
-
+def paper_uv(fragCoord, iResolution):
     ''' (0,0) at the center, -1 left, 1 right, -1 bottom, 1 top. '''
     p = (2.0 * fragCoord.xy - iResolution.xy) / iResolution.x
 
@@ -156,7 +171,18 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
     '''2. some fine noise to make the edges look more like ink on paper. '''
     p += vec2(rand(p.x * 31.0 + p.y * 87.0) * 0.001,
                 rand(p.x * 11.0 + p.y * 67.0) * 0.001)
-    
+    return p
+
+
+@ti.func
+def belts(p, iTime: ti.f32, iResolution, branchless: ti.template()):
+    '''
+    distance to the belts
+    branchless : use the branch-free bezier
+    return vec2(id, outline) : id of the nearest belt (-1 for background) and border weight
+    '''
+    NUM_BELTS = 10
+
     outline = 0.0
     id = -1.0
     for i in range(0, NUM_BELTS):
@@ -172,7 +198,7 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
                 p0 if p.x < p1.x else p1,
                 c0 if p.x < p1.x else c1,
                 p1 if p.x < p1.x else p2,
-                p),
+                p, branchless),
             segment(
                 p1,
                 c1 if p.x < p1.x else c0,
@@ -189,7 +215,7 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
                 p3 if p.x < p4.x else p4,
                 c2 if p.x < p4.x else c3,
                 p4 if p.x < p4.x else p5,
-                p),
+                p, branchless),
             segment(
                 p4,
                 c3 if p.x < p4.x else c2,
@@ -208,7 +234,7 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
                 p3 if p.x < p4.x else p4,
                 c2 if p.x < p4.x else c3,
                 p4 if p.x < p4.x else p5,
-                p),
+                p, branchless),
             segment(
                 p4,
                 c3 if p.x < p4.x else c2,
@@ -223,8 +249,21 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
         id     = mix(id, ti.cast(i, ti.f32), fill)
         outline= mix(outline, border, fill)
 
-    '''define background cracks-like pattern'''
-    background_color = background(fragCoord, iTime, iResolution)
+    return vec2(id, outline)
+
+
+@ti.func
+def paper(p, id: ti.f32, outline: ti.f32, stripes: ti.f32, background_color):
+    '''mix belt colors, pattern and outline, then add paper noise'''
+    red    = vec3(0.816, 0.325, 0.227)
+    green  = vec3(0.584, 0.639, 0.38)
+    blue   = vec3(0.498, 0.588, 0.49)
+    yellow = vec3(0.843, 0.725, 0.353)
+    white  = vec3(0.91,  0.804, 0.596)
+    black  = vec3(0.125, 0.098, 0.078)
+
+    fg_colors = mat83(blue,    red,  green, green, yellow,  blue,   red, green)
+    bg_colors = mat83(red, yellow, yellow,  blue,  white, white, white, white)
 
     fg = fg_colors[ti.cast(id / 4, ti.i32), :] if 0.0 <= id else background_color
     bg = bg_colors[ti.cast(id / 4, ti.i32), :] if 0.0 <= id else background_color
@@ -232,7 +271,7 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
     color = mix(
         mix(fg, 
             bg, 
-            pattern(int(id), p, iResolution)
+            stripes
         ), 
         black, 
         outline
@@ -241,4 +280,27 @@ def mainImage(fragCoord, iTime: ti.f32, iResolution):
     '''Some noise to make it look more paper-y'''
     color *= 0.95 + rand(p.x + p.y) * 0.1
 
-    return color
\ No newline at end of file
+    return color
+
+
+@ti.func
+def shade(fragCoord, iTime: ti.f32, iResolution, branchless: ti.template()):
+    p = paper_uv(fragCoord, iResolution)
+    belt = belts(p, iTime, iResolution, branchless)
+
+    '''define background cracks-like pattern'''
+    background_color = background(fragCoord, iTime, iResolution, branchless)
+
+    stripes = pattern(int(belt.x), p, iResolution, branchless)
+    return paper(p, belt.x, belt.y, stripes, background_color)
+
+
+@ti.func
+def mainImage(fragCoord, iTime: ti.f32, iResolution):
+    return shade(fragCoord, iTime, iResolution, False)
+
+
+@ti.func
+def mainImageBranchless(fragCoord, iTime: ti.f32, iResolution):
+    '''same image with branch-free hot functions'''
+    return shade(fragCoord, iTime, iResolution, True)
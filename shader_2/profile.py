@@ -0,0 +1,88 @@
+import taichi as ti
+from .utils import *
+from .mainImage import paper_uv, belts, pattern, paper
+from .cracks import crack_uv, crack_offset, crack_color
+
+# stages in the order they run, names are also the kernel names for the profiler
+STAGES = ('stage_belts', 'stage_fbm', 'stage_voronoi', 'stage_pattern', 'stage_paper')
+
+RESOLUTIONS = ((320, 180), (640, 360), (1066, 600))
+
+
+def profile_stages(resolution, iTime=1., frames=10):
+    '''
+    render shader #2 at the given resolution as separately launched stage kernels
+    return dict {stage name: average ms per frame}
+    '''
+    w, h = resolution
+    iResolution = vec2(w, h)
+
+    # intermediate results of every stage
+    uv = ti.Vector.field(2, dtype=ti.f32, shape=resolution)
+    belt = ti.Vector.field(2, dtype=ti.f32, shape=resolution) # id, outline
+    crack_uvs = ti.Vector.field(2, dtype=ti.f32, shape=resolution)
+    crack_offsets = ti.Vector.field(2, dtype=ti.f32, shape=resolution)
+    background_color = ti.Vector.field(3, dtype=ti.f32, shape=resolution)
+    stripes = ti.field(dtype=ti.f32, shape=resolution)
+    pixels = ti.Vector.field(3, dtype=ti.f32, shape=resolution)
+
+    @ti.kernel
+    def stage_belts(iTime: ti.f32):
+        for fragCoord in ti.grouped(pixels):
+            p = paper_uv(fragCoord, iResolution)
+            uv[fragCoord] = p
+            belt[fragCoord] = belts(p, iTime, iResolution, False)
+
+    @ti.kernel
+    def stage_fbm(iTime: ti.f32):
+        for fragCoord in ti.grouped(pixels):
+            U = crack_uv(fragCoord, iTime, iResolution)
+            crack_uvs[fragCoord] = U
+            crack_offsets[fragCoord] = crack_offset(U, iTime)
+
+    @ti.kernel
+    def stage_voronoi(iTime: ti.f32):
+        for fragCoord in ti.grouped(pixels):
+            background_color[fragCoord] = crack_color(crack_uvs[fragCoord], crack_offsets[fragCoord], False)
+
+    @ti.kernel
+    def stage_pattern(iTime: ti.f32):
+        for fragCoord in ti.grouped(pixels):
+            stripes[fragCoord] = pattern(int(belt[fragCoord].x), uv[fragCoord], iResolution, False)
+
+    @ti.kernel
+    def stage_paper(iTime: ti.f32):
+        for fragCoord in ti.grouped(pixels):
+            b = belt[fragCoord]
+            pixels[fragCoord] = paper(uv[fragCoord], b.x, b.y, stripes[fragCoord], background_color[fragCoord])
+
+    kernels = (stage_belts, stage_fbm, stage_voronoi, stage_pattern, stage_paper)
+
+    # first launch compiles the kernels, keep it out of the statistics
+    for kernel in kernels:
+        kernel(iTime)
+    ti.sync()
+    ti.profiler.clear_kernel_profiler_info()
+
+    for frame in range(frames):
+        for kernel in kernels:
+            kernel(iTime + frame / 60.)
+    ti.sync()
+
+    return {name: ti.profiler.query_kernel_profiler_info(name).avg for name in STAGES}
+
+
+def profile_stages_report(resolutions=RESOLUTIONS, frames=10):
+    '''print per-stage cost of shader #2 for every resolution'''
+    # kernel statistics are collected by the CPU backend
+    ti.init(arch=ti.cpu, default_fp=ti.f32, kernel_profiler=True)
+
+    for resolution in resolutions:
+        cost = profile_stages(resolution, frames=frames)
+        total = sum(cost.values())
+
+        print(f'{resolution[0]}x{resolution[1]}, {frames} frames')
+        for name in STAGES:
+            share = 100. * cost[name] / total if total > 0 else 0.
+            print(f'  {name[len("stage_"):]:<10}{cost[name]:10.3f} ms{share:8.1f} %')
+        print(f'  {"total":<10}{total:10.3f} ms')
@@ -69,7 +69,7 @@ def length(vec):
 
 @ti.func
 def sign(x: ti.f32):
-    return 1. if x > 0. else -1. if x < 0. else 0.
+    return ti.select(x > 0., 1., ti.select(x < 0., -1., 0.))
 
 
 @ti.func